@@ -141,6 +141,31 @@ QString DataAccessLayer::getLastError() const {
     return lastError;
 }
 
+bool DataAccessLayer::beginTransaction() {
+    if (!db.transaction()) {
+        lastError = "Failed to begin transaction: " + db.lastError().text();
+        return false;
+    }
+    return true;
+}
+
+bool DataAccessLayer::commitTransaction() {
+    if (!db.commit()) {
+        lastError = "Failed to commit transaction: " + db.lastError().text();
+        db.rollback();
+        return false;
+    }
+    return true;
+}
+
+bool DataAccessLayer::rollbackTransaction() {
+    if (!db.rollback()) {
+        lastError = "Failed to roll back transaction: " + db.lastError().text();
+        return false;
+    }
+    return true;
+}
+
 int DataAccessLayer::createSession(const QString &sessionName, const QString &workingDir) {
     QSqlQuery query(db);
     query.prepare("INSERT INTO sessions (session_name, working_directory, session_status) "
@@ -304,7 +329,12 @@ bool DataAccessLayer::updateCommandExecution(int commandId, const QString &outpu
     query.addBindValue(exitCode);
     query.addBindValue(executionTimeMs);
     query.addBindValue(commandId);
-    return query.exec();
+
+    if (!query.exec()) {
+        lastError = "Failed to update command execution: " + query.lastError().text();
+        return false;
+    }
+    return true;
 }
 
 bool DataAccessLayer::updateCommandStatus(int commandId, const QString &status) {
@@ -312,7 +342,12 @@ bool DataAccessLayer::updateCommandStatus(int commandId, const QString &status)
     query.prepare("UPDATE command_history SET execution_status = ? WHERE command_id = ?");
     query.addBindValue(status);
     query.addBindValue(commandId);
-    return query.exec();
+
+    if (!query.exec()) {
+        lastError = "Failed to update command status: " + query.lastError().text();
+        return false;
+    }
+    return true;
 }
 
 CommandRecord DataAccessLayer::getCommandRecord(int commandId) {
@@ -75,6 +75,9 @@ public:
     void closeConnection();
     bool isConnected() const;
     QString getLastError() const;
+    bool beginTransaction();
+    bool commitTransaction();
+    bool rollbackTransaction();
 
     int createSession(const QString &sessionName, const QString &workingDir = "/home");
     bool updateSessionEndTime(int sessionId);
@@ -129,6 +132,7 @@ public:
     bool clearAllData();
     bool backupDatabase(const QString &backupPath);
     QVariant executeRawQuery(const QString &query);
+    QString hashCommand(const QString &command) const;
     
 private:
     QSqlDatabase db;
@@ -137,7 +141,6 @@ private:
 
     bool executeSqlFile(const QString &filePath);
     bool executeQuery(QSqlQuery &query);
-    QString hashCommand(const QString &command) const;
     QDateTime getCurrentTimestamp() const;
 };
 
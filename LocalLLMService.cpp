@@ -1,5 +1,7 @@
 #include "LocalLLMService.h"
 
+#include <QCoreApplication>
+#include <QJsonArray>
 #include <QJsonDocument>
 #include <QJsonObject>
 #include <QNetworkReply>
@@ -9,24 +11,84 @@
 
 LocalLLMService::LocalLLMService(QObject *parent, const QString &model,
                                  const QString &url)
-    : QObject(parent), net(new QNetworkAccessManager(this)), model(model),
+    : QObject(parent), net(sharedNetworkManager()), model(model),
       baseUrl(url) {}
 
+LocalLLMService::~LocalLLMService() {
+  // Replies belong to the shared manager and outlive this service, so an
+  // in-flight request has to be stopped here. Disconnect first: abort()
+  // emits finished() synchronously, and nothing may reach the closing tab.
+  if (activeReply) {
+    activeReply->disconnect(this);
+    activeReply->abort();
+    activeReply->deleteLater();
+  }
+}
+
+QNetworkAccessManager *LocalLLMService::sharedNetworkManager() {
+  // One manager for every tab, so they all draw from the same pool of
+  // keep-alive connections to Ollama instead of each tab opening its own.
+  static QNetworkAccessManager *manager =
+      new QNetworkAccessManager(QCoreApplication::instance());
+  return manager;
+}
+
 void LocalLLMService::generateCommand(const QString &input,
                                       const QString &cwd) {
+  requestCommand(input, cwd, false);
+}
+
+void LocalLLMService::requestCommand(const QString &input, const QString &cwd,
+                                     bool withExamples) {
+  // The compact prompt is tried first: a shorter prompt and a tight token
+  // cap keep the common case fast. The few-shot prompt is only used as a
+  // retry when the compact one produced nothing usable.
+  QNetworkReply *reply =
+      withExamples
+          ? postGenerate(buildPrompt(input, cwd, true), 128)
+          : postGenerate(buildPrompt(input, cwd, false), 64,
+                         {"\n\n", "\nInstruction:"});
+  connect(reply, &QNetworkReply::finished, this,
+          [this, reply, input, cwd, withExamples] {
+            handleReply(reply, input, cwd, withExamples);
+          });
+}
+
+void LocalLLMService::generateCommands(const QStringList &inputs,
+                                       const QString &cwd) {
+  QNetworkReply *reply =
+      postGenerate(buildBatchPrompt(inputs, cwd), 128 * inputs.size());
+  connect(reply, &QNetworkReply::finished, this,
+          [this, reply, inputs, cwd] { handleBatchReply(reply, inputs, cwd); });
+}
+
+QNetworkReply *LocalLLMService::postGenerate(const QString &prompt,
+                                             int numPredict,
+                                             const QStringList &stop) {
+  QJsonObject options{{"temperature", 0.05}, {"num_predict", numPredict}};
+  if (!stop.isEmpty())
+    options["stop"] = QJsonArray::fromStringList(stop);
+
   QJsonObject body;
   body["model"] = model;
-  body["prompt"] = buildPrompt(input, cwd);
+  body["prompt"] = prompt;
   body["stream"] = false;
-  body["options"] = QJsonObject{{"temperature", 0.05}, {"num_predict", 128}};
+  body["options"] = options;
 
   QNetworkRequest req(QUrl(baseUrl + "/api/generate"));
   req.setHeader(QNetworkRequest::ContentTypeHeader, "application/json");
   req.setTransferTimeout(30000);
 
   QNetworkReply *reply = net->post(req, QJsonDocument(body).toJson());
-  connect(reply, &QNetworkReply::finished, this,
-          [this, reply] { handleReply(reply); });
+  activeReply = reply;
+  return reply;
+}
+
+void LocalLLMService::cancel() {
+  if (activeReply) {
+    cancelled = true;
+    activeReply->abort();
+  }
 }
 
 void LocalLLMService::checkAvailability() {
@@ -40,75 +102,189 @@ void LocalLLMService::checkAvailability() {
   });
 }
 
-QString LocalLLMService::buildPrompt(const QString &input,
-                                     const QString &cwd) const {
+QString LocalLLMService::buildPrompt(const QString &input, const QString &cwd,
+                                     bool withExamples) const {
   QString p;
   p += "Convert the instruction to a single bash command. "
-       "Reply with ONLY the command, nothing else.\n\n"
-       "Examples:\n"
-       "Instruction: create a file named hello.txt\n"
-       "Command: touch hello.txt\n\n"
-       "Instruction: list all files\n"
-       "Command: ls -la\n\n"
-       "Instruction: show disk usage\n"
-       "Command: df -h\n\n"
-       "Instruction: show current directory\n"
-       "Command: pwd\n\n";
+       "Reply with ONLY the command, nothing else.\n\n";
+  if (withExamples)
+    p += "Examples:\n"
+         "Instruction: create a file named hello.txt\n"
+         "Command: touch hello.txt\n\n"
+         "Instruction: list all files\n"
+         "Command: ls -la\n\n"
+         "Instruction: show disk usage\n"
+         "Command: df -h\n\n"
+         "Instruction: show current directory\n"
+         "Command: pwd\n\n";
   if (!cwd.isEmpty())
     p += "Current directory: " + cwd + "\n\n";
   p += "Instruction: " + input + "\nCommand:";
   return p;
 }
 
-void LocalLLMService::handleReply(QNetworkReply *reply) {
+QString LocalLLMService::buildBatchPrompt(const QStringList &inputs,
+                                          const QString &cwd) const {
+  QString p;
+  p += "Convert each numbered instruction to a single bash command. "
+       "Reply with ONLY the numbered commands, one per line, nothing else.\n\n"
+       "Example:\n"
+       "Instructions:\n"
+       "1. list all files\n"
+       "2. show disk usage\n"
+       "Commands:\n"
+       "1. ls -la\n"
+       "2. df -h\n\n";
+  if (!cwd.isEmpty())
+    p += "Current directory: " + cwd + "\n\n";
+  p += "Instructions:\n";
+  for (int i = 0; i < inputs.size(); i++)
+    p += QString::number(i + 1) + ". " + inputs[i] + "\n";
+  p += "Commands:\n";
+  return p;
+}
+
+bool LocalLLMService::readResponse(QNetworkReply *reply, QString *response) {
+  if (reply == activeReply)
+    activeReply = nullptr;
+  bool userCancelled = cancelled;
+  cancelled = false;
+  if (reply->error() == QNetworkReply::OperationCanceledError) {
+    // Aborted by cancel(): the caller already knows. Otherwise the transfer
+    // timeout fired.
+    if (!userCancelled)
+      emit errorOccurred("Request timed out");
+    reply->deleteLater();
+    return false;
+  }
   if (reply->error() != QNetworkReply::NoError) {
     emit errorOccurred("Ollama unreachable: " + reply->errorString() +
                        "\nRun: ollama serve && ollama pull deepseek-coder:1.3b");
     reply->deleteLater();
-    return;
+    return false;
   }
   QJsonDocument doc = QJsonDocument::fromJson(reply->readAll());
   reply->deleteLater();
   if (doc.isNull()) {
     emit errorOccurred("Could not parse Ollama response.");
-    return;
+    return false;
   }
-  QString cmd = cleanResponse(doc.object()["response"].toString().trimmed());
-  if (cmd.isEmpty())
+  *response = doc.object()["response"].toString().trimmed();
+  return true;
+}
+
+bool LocalLLMService::checkCommand(const QString &cmd) {
+  if (cmd.isEmpty()) {
     emit errorOccurred("LLM returned empty response.");
-  else if (cmd.contains("CANNOT_PROCESS", Qt::CaseInsensitive) ||
-           cmd.contains("cannot process", Qt::CaseInsensitive))
+    return false;
+  }
+  if (cmd.contains("CANNOT_PROCESS", Qt::CaseInsensitive) ||
+      cmd.contains("cannot process", Qt::CaseInsensitive)) {
     emit errorOccurred("LLM refused to process that request.");
-  else
+    return false;
+  }
+  return true;
+}
+
+void LocalLLMService::handleReply(QNetworkReply *reply, const QString &input,
+                                  const QString &cwd, bool withExamples) {
+  QString response;
+  if (!readResponse(reply, &response))
+    return;
+  QString cmd = cleanResponse(response);
+  if (cmd.isEmpty() && !withExamples) {
+    requestCommand(input, cwd, true);
+    return;
+  }
+  if (checkCommand(cmd))
     emit commandReady(cmd);
 }
 
+void LocalLLMService::handleBatchReply(QNetworkReply *reply,
+                                       const QStringList &inputs,
+                                       const QString &cwd) {
+  QString response;
+  if (!readResponse(reply, &response))
+    return;
+
+  static const QRegularExpression numberedRe(
+      R"(^\s*(\d+)[.):]\s*(.+)$)", QRegularExpression::MultilineOption);
+
+  QStringList commands(inputs.size());
+  QRegularExpressionMatchIterator it = numberedRe.globalMatch(response);
+  while (it.hasNext()) {
+    QRegularExpressionMatch m = it.next();
+    int index = m.captured(1).toInt() - 1;
+    if (index >= 0 && index < commands.size() && commands[index].isEmpty())
+      commands[index] = cleanResponse(m.captured(2));
+  }
+
+  // The model didn't answer every instruction in the expected format; fall
+  // back to one request per instruction.
+  if (commands.contains(QString())) {
+    generateSequentially(inputs, cwd, {});
+    return;
+  }
+
+  for (const QString &cmd : commands)
+    if (!checkCommand(cmd))
+      return;
+  emit commandsReady(commands);
+}
+
+void LocalLLMService::generateSequentially(const QStringList &inputs,
+                                           const QString &cwd,
+                                           const QStringList &commands) {
+  if (commands.size() == inputs.size()) {
+    emit commandsReady(commands);
+    return;
+  }
+
+  QNetworkReply *reply =
+      postGenerate(buildPrompt(inputs[commands.size()], cwd, true), 128);
+  connect(reply, &QNetworkReply::finished, this,
+          [this, reply, inputs, cwd, commands] {
+            QString response;
+            if (!readResponse(reply, &response))
+              return;
+            QString cmd = cleanResponse(response);
+            if (checkCommand(cmd))
+              generateSequentially(inputs, cwd, commands + QStringList{cmd});
+          });
+}
+
 QString LocalLLMService::cleanResponse(QString s) {
   s = s.trimmed();
 
-  // Strip markdown code blocks
-  static QRegularExpression cb(R"(```(?:bash|sh)?\s*([\s\S]*?)```)");
-  auto m = cb.match(s);
-  if (m.hasMatch())
-    s = m.captured(1).trimmed();
+  // Strip markdown code blocks (most replies have none, so skip the regex)
+  if (s.contains(QLatin1String("```"))) {
+    static const QRegularExpression cb(R"(```(?:bash|sh)?\s*([\s\S]*?)```)");
+    auto m = cb.match(s);
+    if (m.hasMatch())
+      s = m.captured(1).trimmed();
+  }
 
-  // Take the first non-empty line
+  // Take the first non-empty line, scanning in place instead of splitting
   QString firstLine;
-  for (const QString &line : s.split('\n')) {
-    QString l = line.trimmed();
+  for (qsizetype start = 0; start < s.size();) {
+    qsizetype end = s.indexOf('\n', start);
+    if (end == -1)
+      end = s.size();
+    QStringView l = QStringView(s).mid(start, end - start).trimmed();
     if (!l.isEmpty()) {
-      if (l.startsWith("$ "))
+      if (l.startsWith(u"$ "))
         l = l.mid(2).trimmed();
-      firstLine = l;
+      firstLine = l.toString();
       break;
     }
+    start = end + 1;
   }
 
   if (firstLine.isEmpty())
     return s;
 
   // Remove common LLM pollution prefixes
-  static QRegularExpression prefixRe(
+  static const QRegularExpression prefixRe(
       R"(^(?:Command:\s*|Answer:\s*|Output:\s*|Result:\s*|Here.*?:\s*))",
       QRegularExpression::CaseInsensitiveOption);
   firstLine.replace(prefixRe, "");
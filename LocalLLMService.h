@@ -4,6 +4,7 @@
 #include <QNetworkAccessManager>
 #include <QObject>
 #include <QString>
+#include <QStringList>
 
 class LocalLLMService : public QObject {
   Q_OBJECT
@@ -12,23 +13,48 @@ public:
   explicit LocalLLMService(QObject *parent = nullptr,
                            const QString &model = "deepseek-coder:1.3b",
                            const QString &url = "http://localhost:11434");
+  ~LocalLLMService() override;
+
+  // Bump whenever buildPrompt() or the command cache key changes so stale
+  // cached commands are not reused.
+  static constexpr int PROMPT_VERSION = 4;
 
   void generateCommand(const QString &input, const QString &cwd = {});
+  void generateCommands(const QStringList &inputs, const QString &cwd = {});
   void checkAvailability();
+  void cancel();
+  QString modelName() const { return model; }
 
 signals:
   void commandReady(const QString &command);
+  void commandsReady(const QStringList &commands);
   void errorOccurred(const QString &message);
   void availabilityChecked(bool ok, const QString &modelName);
 
 private:
   QNetworkAccessManager *net;
+  QNetworkReply *activeReply = nullptr;
+  bool cancelled = false;
   QString model;
   QString baseUrl;
 
-  QString buildPrompt(const QString &input, const QString &cwd) const;
-  void handleReply(QNetworkReply *reply);
+  QString buildPrompt(const QString &input, const QString &cwd,
+                      bool withExamples) const;
+  QString buildBatchPrompt(const QStringList &inputs, const QString &cwd) const;
+  QNetworkReply *postGenerate(const QString &prompt, int numPredict,
+                              const QStringList &stop = {});
+  void requestCommand(const QString &input, const QString &cwd,
+                      bool withExamples);
+  bool readResponse(QNetworkReply *reply, QString *response);
+  bool checkCommand(const QString &cmd);
+  void handleReply(QNetworkReply *reply, const QString &input,
+                   const QString &cwd, bool withExamples);
+  void handleBatchReply(QNetworkReply *reply, const QStringList &inputs,
+                        const QString &cwd);
+  void generateSequentially(const QStringList &inputs, const QString &cwd,
+                            const QStringList &commands);
   static QString cleanResponse(QString s);
+  static QNetworkAccessManager *sharedNetworkManager();
 };
 
 #endif 
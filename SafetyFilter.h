@@ -3,7 +3,11 @@
 
 #include <QList>
 #include <QPair>
+#include <QProcess>
+#include <QRegularExpression>
+#include <QSet>
 #include <QString>
+#include <QStringList>
 
 struct SafetyResult {
   bool isSafe;
@@ -11,7 +15,22 @@ struct SafetyResult {
 };
 
 inline SafetyResult isSafeCommand(const QString &cmd) {
-  QString c = cmd.trimmed().toLower();
+  // Fast path: read-only commands without shell metacharacters cannot chain
+  // into anything dangerous, so skip the full pattern scan for them.
+  static const QSet<QString> SAFE_COMMANDS = {
+      "ls",    "pwd",  "cat",   "head",   "tail",     "less",   "more",
+      "echo",  "grep", "wc",    "date",   "cal",      "whoami", "id",
+      "uname", "df",   "du",    "free",   "ps",       "tree",   "file",
+      "stat",  "diff", "which", "whereis", "hostname", "uptime",
+  };
+  static const QRegularExpression SHELL_META_RE("[;&|<>`$\\n]");
+
+  // Tokenize once; the first word drives both the fast path and the sudo
+  // check below.
+  const QStringList tokens = QProcess::splitCommand(cmd);
+  const QString first = tokens.value(0);
+  if (SAFE_COMMANDS.contains(first) && !SHELL_META_RE.match(cmd).hasMatch())
+    return {true, ""};
 
   static const QList<QPair<QString, QString>> PATTERNS = {
       {":(){:|:&};:", "Fork bomb detected"},
@@ -46,12 +65,27 @@ inline SafetyResult isSafeCommand(const QString &cmd) {
       {"curl.*| sh", "Remote code execution via curl|sh"},
   };
 
-  for (const auto &[pattern, reason] : PATTERNS)
-    if (c.contains(pattern))
-      return {false, reason};
+  // All patterns fused into one alternation so the command is scanned once.
+  // Each pattern gets its own capture group; the group that matched tells us
+  // which reason to report. Matching is case-insensitive, so the command is
+  // used as-is rather than through a lowered copy.
+  static const QRegularExpression DANGER_RE = [] {
+    QStringList alternatives;
+    for (const auto &[pattern, reason] : PATTERNS)
+      alternatives << "(" + QRegularExpression::escape(pattern) + ")";
+    return QRegularExpression(alternatives.join('|'),
+                              QRegularExpression::CaseInsensitiveOption);
+  }();
+
+  QRegularExpressionMatch m = DANGER_RE.match(cmd);
+  if (m.hasMatch())
+    return {false, PATTERNS[m.lastCapturedIndex() - 1].second};
+
+  static const QRegularExpression PRIVILEGED_RE(
+      "rm -rf|mkfs|dd if=|> /dev/", QRegularExpression::CaseInsensitiveOption);
 
-  if (c.startsWith("sudo") && (c.contains("rm -rf") || c.contains("mkfs") ||
-                               c.contains("dd if=") || c.contains("> /dev/")))
+  if (first.compare("sudo", Qt::CaseInsensitive) == 0 &&
+      PRIVILEGED_RE.match(cmd).hasMatch())
     return {false, "Dangerous privileged command blocked"};
 
   return {true, ""};
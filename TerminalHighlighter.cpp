@@ -1,105 +1,141 @@
 #include "TerminalHighlighter.h"
 
+namespace {
+// Compiled once at load time; highlightBlock() runs for every output line.
+const QRegularExpression errorRegex("(?i)(\\[ERROR\\]|\\[BLOCKED\\]|error:|failed:|exception:|permission denied).*");
+const QRegularExpression pathRegex("(?<!\\w)(/|~/)[\\w\\-\\./]+");
+const QRegularExpression folderRegex("(?<!\\w)([\\w\\-\\.]+/)");
+const QRegularExpression fileRegex("(?<!\\w)([\\w\\-]+\\.[a-zA-Z0-9]+)(?!/)");
+const QRegularExpression promptRegex("^([^@]+@[^:]+):([^\\$]+)(\\$\\s*)(.*)$");
+const QRegularExpression oldPromptRegex("^(\\[.*\\]\\$\\s*)(.*)$");
+}
+
 TerminalHighlighter::TerminalHighlighter(QTextDocument *parent)
-    : QSyntaxHighlighter(parent) {
-    updateFormats();
+    : QSyntaxHighlighter(parent), m_palette(&darkPalette()) {
 }
 
 void TerminalHighlighter::setTheme(bool isDark) {
-    m_isDarkTheme = isDark;
-    updateFormats();
+    m_palette = isDark ? &darkPalette() : &lightPalette();
     rehighlight();
 }
 
-void TerminalHighlighter::updateFormats() {
-    if (m_isDarkTheme) {
-        // Dark theme colors
-        errorFormat.setForeground(QColor("#ff5555"));       // Red
-        commandFormat.setForeground(QColor("#50fa7b"));     // Green
-        pathFormat.setForeground(QColor("#8be9fd"));        // Cyan/Blue
-        folderFormat.setForeground(QColor("#bd93f9"));      // Purple
-        fileFormat.setForeground(QColor("#f8f8f2"));        // White
-        promptFormat.setForeground(QColor("#f1fa8c"));      // Yellow for prompt symbol
-        userHostFormat.setForeground(QColor("#50fa7b"));    // Green
-    } else {
-        // Light theme colors
-        errorFormat.setForeground(QColor("#d73a49"));       // Red
-        commandFormat.setForeground(QColor("#22863a"));     // Green
-        pathFormat.setForeground(QColor("#005cc5"));        // Blue
-        folderFormat.setForeground(QColor("#6f42c1"));      // Purple
-        fileFormat.setForeground(QColor("#24292e"));        // Black
-        promptFormat.setForeground(QColor("#b08800"));      // Yellow/Brown for prompt symbol
-        userHostFormat.setForeground(QColor("#22863a"));    // Green
-    }
+TerminalHighlighter::Palette TerminalHighlighter::makePalette(
+        const char *error, const char *command, const char *path,
+        const char *folder, const char *file, const char *prompt,
+        const char *userHost) {
+    Palette p;
+    p.errorFormat.setForeground(QColor(error));
+    p.commandFormat.setForeground(QColor(command));
+    p.pathFormat.setForeground(QColor(path));
+    p.folderFormat.setForeground(QColor(folder));
+    p.fileFormat.setForeground(QColor(file));
+    p.promptFormat.setForeground(QColor(prompt));
+    p.userHostFormat.setForeground(QColor(userHost));
 
-    errorFormat.setFontWeight(QFont::Bold);
-    commandFormat.setFontWeight(QFont::Bold);
-    folderFormat.setFontWeight(QFont::Bold);
-    userHostFormat.setFontWeight(QFont::Bold);
+    p.errorFormat.setFontWeight(QFont::Bold);
+    p.commandFormat.setFontWeight(QFont::Bold);
+    p.folderFormat.setFontWeight(QFont::Bold);
+    p.userHostFormat.setFontWeight(QFont::Bold);
+    return p;
+}
+
+const TerminalHighlighter::Palette &TerminalHighlighter::darkPalette() {
+    static const Palette palette = makePalette(
+        "#ff5555",   // error: red
+        "#50fa7b",   // command: green
+        "#8be9fd",   // path: cyan/blue
+        "#bd93f9",   // folder: purple
+        "#f8f8f2",   // file: white
+        "#f1fa8c",   // prompt symbol: yellow
+        "#50fa7b");  // user@host: green
+    return palette;
+}
+
+const TerminalHighlighter::Palette &TerminalHighlighter::lightPalette() {
+    static const Palette palette = makePalette(
+        "#d73a49",   // error: red
+        "#22863a",   // command: green
+        "#005cc5",   // path: blue
+        "#6f42c1",   // folder: purple
+        "#24292e",   // file: black
+        "#b08800",   // prompt symbol: yellow/brown
+        "#22863a");  // user@host: green
+    return palette;
 }
 
 void TerminalHighlighter::highlightBlock(const QString &text) {
+    if (text.isEmpty())
+        return;
+
+    // Most output lines lack the characters the patterns below are anchored
+    // on, so check for those first and skip the regex scans outright.
+    const bool hasSlash = text.contains(QLatin1Char('/'));
+    const bool hasDot = text.contains(QLatin1Char('.'));
+    const bool hasDollar = text.contains(QLatin1Char('$'));
+
     // 1. Errors
-    QRegularExpression errorRegex("(?i)(\\[ERROR\\]|\\[BLOCKED\\]|error:|failed:|exception:|permission denied).*");
     QRegularExpressionMatchIterator errIt = errorRegex.globalMatch(text);
     while (errIt.hasNext()) {
         QRegularExpressionMatch match = errIt.next();
-        setFormat(match.capturedStart(), match.capturedLength(), errorFormat);
+        setFormat(match.capturedStart(), match.capturedLength(), m_palette->errorFormat);
     }
 
     // 2. Folder/file parsing heuristics
     // E.g., paths starting with / or ~/ or just simple extensions
-    QRegularExpression pathRegex("(?<!\\w)(/|~/)[\\w\\-\\./]+");
-    QRegularExpressionMatchIterator pathIt = pathRegex.globalMatch(text);
-    while (pathIt.hasNext()) {
-        QRegularExpressionMatch match = pathIt.next();
-        setFormat(match.capturedStart(), match.capturedLength(), pathFormat);
+    if (hasSlash) {
+        QRegularExpressionMatchIterator pathIt = pathRegex.globalMatch(text);
+        while (pathIt.hasNext()) {
+            QRegularExpressionMatch match = pathIt.next();
+            setFormat(match.capturedStart(), match.capturedLength(), m_palette->pathFormat);
+        }
     }
 
     // Identify folders ending with / in list outputs (ls -F style) or normal words ending with /
-    QRegularExpression folderRegex("(?<!\\w)([\\w\\-\\.]+/)");
-    QRegularExpressionMatchIterator folderIt = folderRegex.globalMatch(text);
-    while (folderIt.hasNext()) {
-        QRegularExpressionMatch match = folderIt.next();
-        setFormat(match.capturedStart(), match.capturedLength(), folderFormat);
+    if (hasSlash) {
+        QRegularExpressionMatchIterator folderIt = folderRegex.globalMatch(text);
+        while (folderIt.hasNext()) {
+            QRegularExpressionMatch match = folderIt.next();
+            setFormat(match.capturedStart(), match.capturedLength(), m_palette->folderFormat);
+        }
     }
 
     // Identify typical files (e.g., with extension like .cpp, .txt, .h)
-    QRegularExpression fileRegex("(?<!\\w)([\\w\\-]+\\.[a-zA-Z0-9]+)(?!/)");
-    QRegularExpressionMatchIterator fileIt = fileRegex.globalMatch(text);
-    while (fileIt.hasNext()) {
-        QRegularExpressionMatch match = fileIt.next();
-        // If it's not already formatted as an error, format as file
-        setFormat(match.capturedStart(), match.capturedLength(), fileFormat);
+    if (hasDot) {
+        QRegularExpressionMatchIterator fileIt = fileRegex.globalMatch(text);
+        while (fileIt.hasNext()) {
+            QRegularExpressionMatch match = fileIt.next();
+            // If it's not already formatted as an error, format as file
+            setFormat(match.capturedStart(), match.capturedLength(), m_palette->fileFormat);
+        }
     }
 
     // 3. Prompt and Command
     // Prompt pattern: user@host:path$ command
-    QRegularExpression promptRegex("^([^@]+@[^:]+):([^\\$]+)(\\$\\s*)(.*)$");
+    if (!hasDollar)
+        return;
     QRegularExpressionMatch promptMatch = promptRegex.match(text);
     if (promptMatch.hasMatch()) {
         // Highlight user@host
-        setFormat(promptMatch.capturedStart(1), promptMatch.capturedLength(1), userHostFormat);
+        setFormat(promptMatch.capturedStart(1), promptMatch.capturedLength(1), m_palette->userHostFormat);
         
         // Highlight path
-        setFormat(promptMatch.capturedStart(2), promptMatch.capturedLength(2), pathFormat);
+        setFormat(promptMatch.capturedStart(2), promptMatch.capturedLength(2), m_palette->pathFormat);
         
         // Highlight $
-        setFormat(promptMatch.capturedStart(3), promptMatch.capturedLength(3), promptFormat);
+        setFormat(promptMatch.capturedStart(3), promptMatch.capturedLength(3), m_palette->promptFormat);
 
         // Highlight the command part
         QString cmdPart = promptMatch.captured(4);
         if (!cmdPart.isEmpty()) {
-            setFormat(promptMatch.capturedStart(4), promptMatch.capturedLength(4), commandFormat);
+            setFormat(promptMatch.capturedStart(4), promptMatch.capturedLength(4), m_palette->commandFormat);
         }
     } else {
         // Fallback for old prompt format
-        QRegularExpression oldPromptRegex("^(\\[.*\\]\\$\\s*)(.*)$");
         QRegularExpressionMatch oldMatch = oldPromptRegex.match(text);
         if (oldMatch.hasMatch()) {
             QString cmdPart = oldMatch.captured(2);
             if (!cmdPart.isEmpty()) {
-                setFormat(oldMatch.capturedStart(2), oldMatch.capturedLength(2), commandFormat);
+                setFormat(oldMatch.capturedStart(2), oldMatch.capturedLength(2), m_palette->commandFormat);
             }
         }
     }
@@ -16,17 +16,25 @@ protected:
     void highlightBlock(const QString &text) override;
 
 private:
-    bool m_isDarkTheme = true;
-    
-    QTextCharFormat errorFormat;
-    QTextCharFormat commandFormat;
-    QTextCharFormat pathFormat;
-    QTextCharFormat folderFormat;
-    QTextCharFormat fileFormat;
-    QTextCharFormat promptFormat;
-    QTextCharFormat userHostFormat;
-
-    void updateFormats();
+    // Text formats for one color theme; built once and shared by every tab.
+    struct Palette {
+        QTextCharFormat errorFormat;
+        QTextCharFormat commandFormat;
+        QTextCharFormat pathFormat;
+        QTextCharFormat folderFormat;
+        QTextCharFormat fileFormat;
+        QTextCharFormat promptFormat;
+        QTextCharFormat userHostFormat;
+    };
+
+    static const Palette &darkPalette();
+    static const Palette &lightPalette();
+    static Palette makePalette(const char *error, const char *command,
+                               const char *path, const char *folder,
+                               const char *file, const char *prompt,
+                               const char *userHost);
+
+    const Palette *m_palette;
 };
 
 #endif // TERMINALHIGHLIGHTER_H
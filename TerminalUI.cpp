@@ -6,22 +6,119 @@
 #include <QAction>
 #include <QApplication>
 #include <QContextMenuEvent>
+#include <QDebug>
 #include <QDir>
+#include <QFont>
 #include <QFileInfo>
 #include <QKeyEvent>
 #include <QMenu>
+#include <QMimeData>
+#include <QPalette>
 #include <QProcess>
+#include <QScrollBar>
+#include <QRegularExpression>
+#include <QStandardPaths>
 #include <QSysInfo>
 #include <QTextBlock>
 #include <QTextCursor>
+#include <QTimer>
+
+namespace {
+// Groups the edits made while it is alive into a single document change, so
+// a status line followed by a new prompt costs one relayout instead of two.
+class EditBlock {
+public:
+  explicit EditBlock(QPlainTextEdit *edit)
+      : edit(edit), cursor(edit->document()) {
+    cursor.beginEditBlock();
+  }
+  ~EditBlock() {
+    cursor.endEditBlock();
+    // Layout is only up to date once the block closes.
+    edit->ensureCursorVisible();
+  }
+
+private:
+  QPlainTextEdit *edit;
+  QTextCursor cursor;
+};
+} // namespace
 
 TerminalUI::TerminalUI(QWidget *parent) : QPlainTextEdit(parent) {
+  // The terminal is an append-only log; an undo stack would just keep a
+  // copy of every insertion. Disable it before anything touches the
+  // document (clear() preserves the setting).
+  setUndoRedoEnabled(false);
   highlighter = new TerminalHighlighter(document());
+
+  // Font and spacing are theme independent, so set them once here;
+  // applyTheme() only has to swap colors.
+  QFont font;
+  font.setFamilies(
+      {"JetBrains Mono", "Fira Code", "Cascadia Code", "Monospace"});
+  font.setStyleHint(QFont::Monospace);
+  font.setPointSize(12);
+  setFont(font);
+  setFrameShape(QFrame::NoFrame);
+  document()->setDocumentMargin(12);
   applyTheme();
   setLineWrapMode(QPlainTextEdit::WidgetWidth);
-  setUndoRedoEnabled(false);
-
-  currentDir = QDir::homePath();
+  // Shell input is not prose: keep input methods from running prediction
+  // and auto-capitalisation passes over every keystroke.
+  setInputMethodHints(Qt::ImhNoPredictiveText | Qt::ImhNoAutoUppercase |
+                      Qt::ImhPreferLatin);
+  // Drop the oldest lines past the scrollback limit so insertion and layout
+  // cost stay flat in long sessions.
+  setMaximumBlockCount(MAX_SCROLLBACK);
+
+  // The user and host never change during a session, so look them up once
+  // instead of querying the environment and hostname for every prompt.
+  QString user = qEnvironmentVariable("USER");
+  QString host = QSysInfo::machineHostName();
+  if (user.isEmpty())
+    user = "user";
+  if (host.isEmpty())
+    host = "localhost";
+  userHost = user + "@" + host;
+  setCurrentDir(QDir::homePath());
+
+  outputFlushTimer = new QTimer(this);
+  outputFlushTimer->setSingleShot(true);
+  outputFlushTimer->setInterval(OUTPUT_FLUSH_MS);
+  connect(outputFlushTimer, &QTimer::timeout, this, &TerminalUI::flushOutput);
+
+  // One QProcess per tab, reused for every command; only the child process
+  // is new each time, not the QObject and its connections.
+  process = new QProcess(this);
+  connect(process, &QProcess::readyReadStandardOutput, this, [this] {
+    onProcessOutput(process->readAllStandardOutput(), recordedOutput,
+                    stdoutDecoder);
+  });
+  connect(process, &QProcess::readyReadStandardError, this, [this] {
+    onProcessOutput(process->readAllStandardError(), recordedError,
+                    stderrDecoder);
+  });
+  // Queued so the next command is only started once QProcess has finished
+  // cleaning up after the previous one.
+  connect(process, &QProcess::finished, this, &TerminalUI::onProcessFinished,
+          Qt::QueuedConnection);
+  connect(
+      process, &QProcess::errorOccurred, this,
+      [this](QProcess::ProcessError error) {
+        if (error == QProcess::FailedToStart)
+          onProcessFinished();
+      },
+      Qt::QueuedConnection);
+
+  commandTimeout = new QTimer(this);
+  commandTimeout->setSingleShot(true);
+  commandTimeout->setInterval(COMMAND_TIMEOUT_MS);
+  connect(commandTimeout, &QTimer::timeout, this, [this] {
+    if (process->state() != QProcess::NotRunning) {
+      processTimedOut = true;
+      process->kill();
+    }
+  });
 
   // Initialize Data Access Layer
   dal = new DataAccessLayer("terminal_app.db");
@@ -40,6 +137,8 @@ TerminalUI::TerminalUI(QWidget *parent) : QPlainTextEdit(parent) {
   llm = new LocalLLMService(this);
   connect(llm, &LocalLLMService::commandReady, this,
           &TerminalUI::onCommandReady);
+  connect(llm, &LocalLLMService::commandsReady, this,
+          &TerminalUI::onCommandsReady);
   connect(llm, &LocalLLMService::errorOccurred, this,
           &TerminalUI::onOllamaError);
   connect(llm, &LocalLLMService::availabilityChecked, this,
@@ -49,18 +148,29 @@ TerminalUI::TerminalUI(QWidget *parent) : QPlainTextEdit(parent) {
   llm->checkAvailability();
 }
 
-void TerminalUI::applyTheme() {
-  if (isDarkTheme) {
-    setStyleSheet(
-        "background-color:#0d1117; color:#c9d1d9;"
-        "font-family:'JetBrains Mono','Fira Code','Cascadia Code','Monospace';"
-        "font-size:12pt; border:none; padding:8px;");
-  } else {
-    setStyleSheet(
-        "background-color:#ffffff; color:#24292e;"
-        "font-family:'JetBrains Mono','Fira Code','Cascadia Code','Monospace';"
-        "font-size:12pt; border:none; padding:8px;");
+TerminalUI::~TerminalUI() {
+  // Stop the child while the rest of the tab still exists: ~QProcess would
+  // kill and wait for it from the QObject destructor, after our members are
+  // gone, and could still deliver output to the lambdas above.
+  process->disconnect(this);
+  commandTimeout->stop();
+  if (process->state() != QProcess::NotRunning) {
+    process->kill();
+    process->waitForFinished();
   }
+}
+
+void TerminalUI::applyTheme() {
+  // A palette change is a plain value update; a stylesheet would be parsed
+  // and the widget repolished on every toggle.
+  static const QColor DARK_BASE(0x0d, 0x11, 0x17), DARK_TEXT(0xc9, 0xd1, 0xd9);
+  static const QColor LIGHT_BASE(0xff, 0xff, 0xff),
+      LIGHT_TEXT(0x24, 0x29, 0x2e);
+
+  QPalette pal = palette();
+  pal.setColor(QPalette::Base, isDarkTheme ? DARK_BASE : LIGHT_BASE);
+  pal.setColor(QPalette::Text, isDarkTheme ? DARK_TEXT : LIGHT_TEXT);
+  setPalette(pal);
   highlighter->setTheme(isDarkTheme);
 }
 
@@ -70,22 +180,25 @@ void TerminalUI::toggleTheme() {
 }
 
 void TerminalUI::printBanner() {
-  appendPlainText("       SE TERMINAL  ·  AI-POWERED LINUX TERMINAL        ");
-  appendPlainText("       Model: Llama 3.1 8B                            ");
+  static const QString BANNER = QStringLiteral(
+      "       SE TERMINAL  ·  AI-POWERED LINUX TERMINAL        \n"
+      "       Model: Llama 3.1 8B                            ");
+  appendPlainText(BANNER);
 }
 
-void TerminalUI::newPrompt() {
-  QString user = qEnvironmentVariable("USER");
-  QString host = QSysInfo::machineHostName();
-  if (user.isEmpty())
-    user = "user";
-  if (host.isEmpty())
-    host = "localhost";
-
-  QString prompt = user + "@" + host + ":" + shortCwd() + "$ ";
+void TerminalUI::setCurrentDir(const QString &dir) {
+  currentDir = dir;
+  // The prompt only changes with the directory, so build it here rather than
+  // on every newPrompt().
+  promptText = "\n" + userHost + ":" + shortCwd() + "$ ";
+}
 
+void TerminalUI::newPrompt() {
   moveCursor(QTextCursor::End);
-  insertPlainText("\n" + prompt);
+  insertPlainText(promptText);
+  // Remember where the input starts so keystrokes don't have to search the
+  // line for "$ " again.
+  promptLength = promptText.size() - 1;
   moveCursor(QTextCursor::End);
   ensureCursorVisible();
 }
@@ -95,15 +208,25 @@ void TerminalUI::appendLine(const QString &text) {
   appendPlainText(text);
 }
 
+// Where the input starts on the last line: after the prompt, or at column 0
+// when that line isn't the prompt line (e.g. the tail of a multi-line paste).
+int TerminalUI::inputStart() const {
+  if (promptLength == 0)
+    return 0;
+  const QString text = document()->lastBlock().text();
+  return QStringView(text).startsWith(QStringView(promptText).mid(1))
+             ? promptLength
+             : 0;
+}
+
+QString TerminalUI::currentInput() const {
+  return document()->lastBlock().text().mid(inputStart());
+}
+
 void TerminalUI::replaceCurrentLine(const QString &text) {
   QTextCursor cur = textCursor();
   cur.movePosition(QTextCursor::StartOfBlock);
-
-  QString lineText = cur.block().text();
-  int dol = lineText.indexOf("$ ");
-  int promptLen = (dol != -1) ? dol + 2 : 2;
-
-  cur.movePosition(QTextCursor::Right, QTextCursor::MoveAnchor, promptLen);
+  cur.movePosition(QTextCursor::Right, QTextCursor::MoveAnchor, inputStart());
   cur.movePosition(QTextCursor::EndOfBlock, QTextCursor::KeepAnchor);
   cur.removeSelectedText();
 
@@ -117,6 +240,16 @@ void TerminalUI::keyPressEvent(QKeyEvent *event) {
   if (inputLocked) {
     if (event->key() == Qt::Key_C &&
         (event->modifiers() & Qt::ControlModifier)) {
+      commandQueue.clear();
+      if (processRunning) {
+        processCancelled = true;
+        process->kill();
+        return;
+      }
+      // Abort the generation so a late reply doesn't run a command the
+      // user already cancelled.
+      llm->cancel();
+      pendingBatch.clear();
       inputLocked = false;
       appendLine("\n[Cancelled]");
       newPrompt();
@@ -148,9 +281,7 @@ void TerminalUI::keyPressEvent(QKeyEvent *event) {
 
     // Save current input before browsing history
     if (historyIndex == static_cast<int>(history.size())) {
-      QString lineText = textCursor().block().text();
-      int dol = lineText.indexOf("$ ");
-      currentBuffer = (dol != -1) ? lineText.mid(dol + 2) : "";
+      currentBuffer = currentInput();
     }
 
     if (historyIndex > 0) {
@@ -187,39 +318,43 @@ void TerminalUI::keyPressEvent(QKeyEvent *event) {
   // ENTER KEY
   if (event->key() == Qt::Key_Return || event->key() == Qt::Key_Enter) {
     moveCursor(QTextCursor::End);
-    QString line = textCursor().block().text();
-    int dol = line.indexOf("$ ");
-    if (dol != -1)
-      line = line.mid(dol + 2);
-    onCommandSubmitted(line.trimmed());
+    onCommandSubmitted(currentInput().trimmed());
     return;
   }
 
   QTextCursor cur = textCursor();
   bool isLastBlock = (cur.block() == document()->lastBlock());
 
-  QString lastLineText = document()->lastBlock().text();
-  int dol = lastLineText.indexOf("$ ");
-  int promptLen = (dol != -1) ? dol + 2 : 2;
+  const int promptLen = inputStart();
+
+  const bool hasText =
+      !event->text().isEmpty() &&
+      !(event->modifiers() &
+        (Qt::ControlModifier | Qt::AltModifier | Qt::MetaModifier));
+  // A plain printable character can't be a clipboard shortcut, so only look
+  // the others up; each matches() call walks the platform key bindings.
+  const bool isTyping = hasText && event->text().front().isPrint();
+  const bool isCut = !isTyping && event->matches(QKeySequence::Cut);
+
+  // Copy anywhere: with nothing selected there's nothing to do, so don't
+  // hand the event on to QPlainTextEdit at all.
+  if (!isTyping && event->matches(QKeySequence::Copy)) {
+    if (cur.hasSelection())
+      copy();
+    return;
+  }
 
   // Identify if it's a modification action
   bool isModification = false;
   if (event->key() == Qt::Key_Backspace || event->key() == Qt::Key_Delete)
     isModification = true;
-  else if (event->matches(QKeySequence::Paste) ||
-           event->matches(QKeySequence::Cut))
+  else if (isCut || (!isTyping && event->matches(QKeySequence::Paste)))
     isModification = true;
-  else if (!event->text().isEmpty() &&
-           !(event->modifiers() &
-             (Qt::ControlModifier | Qt::AltModifier | Qt::MetaModifier)))
+  else if (hasText)
     isModification = true;
 
   if (!isLastBlock) {
-    if (event->matches(QKeySequence::Copy)) {
-      QPlainTextEdit::keyPressEvent(event);
-      return;
-    }
-    if (event->matches(QKeySequence::Cut)) {
+    if (isCut) {
       copy(); // Treat cut as copy in read-only areas
       return;
     }
@@ -288,31 +423,13 @@ void TerminalUI::onCommandSubmitted(const QString &raw) {
 
   // appendLine("DEBUG: " + raw);
 
-  if (!raw.isEmpty()) {
-    // Store history (avoid duplicates)
-    if (history.empty() || history.back() != raw) {
-      history.push_back(raw);
-    }
-    historyIndex = history.size();
-  }
+  // Only the AI path sets this; anything typed directly is recorded as is.
+  pendingInput.clear();
+  addToHistory(raw);
+  historyIndex = history.size();
 
-  if (raw == "clear") {
-    clear();
-    newPrompt();
-    return;
-  }
-  if (raw == "exit" || raw == "quit") {
-    QApplication::quit();
-    return;
-  }
-  if (raw == "help") {
-    appendLine(helpText());
-    newPrompt();
-    return;
-  }
-  if (raw == "pwd") {
-    appendLine(currentDir);
-    newPrompt();
+  if (BuiltinHandler handler = builtins().value(raw)) {
+    (this->*handler)();
     return;
   }
   if (raw == "cd" || raw.startsWith("cd ")) {
@@ -331,12 +448,23 @@ void TerminalUI::onCommandSubmitted(const QString &raw) {
   }
 
   pendingInput = raw;
+
+  // Repeated instructions are answered from the command cache instead of
+  // another round-trip to the model.
+  QString cached = dal->getCachedCommand(llmCacheKey(raw));
+  if (!cached.isEmpty()) {
+    appendLine("[AI]    Cached: " + cached);
+    execute(cached);
+    return;
+  }
+
   inputLocked = true;
   appendLine("[AI]    Thinking...");
   llm->generateCommand(raw, currentDir);
 }
 
 void TerminalUI::handleCd(const QString &raw) {
+  EditBlock block(this);
   QString arg = raw.mid(2).trimmed();
 
   if (arg.isEmpty() || arg == "~")
@@ -344,80 +472,329 @@ void TerminalUI::handleCd(const QString &raw) {
   else if (arg.startsWith("~/"))
     arg = QDir::homePath() + arg.mid(1);
 
-  QDir target(arg.startsWith('/') ? arg : currentDir + "/" + arg);
-  QString resolved = QDir::cleanPath(target.absolutePath());
+  QString resolved =
+      QDir::cleanPath(arg.startsWith('/') ? arg : currentDir + "/" + arg);
 
+  // QFileInfo stats once and caches the result for the checks below.
   QFileInfo fi(resolved);
-  if (!fi.exists()) {
-    appendLine("[ERROR] cd: " + arg + ": No such file or directory");
-    newPrompt();
-    return;
-  }
-  if (!fi.isDir()) {
-    appendLine("[ERROR] cd: " + arg + ": Not a directory");
-    newPrompt();
-    return;
-  }
-  if (!fi.isReadable()) {
-    appendLine("[ERROR] cd: " + arg + ": Permission denied");
-    newPrompt();
-    return;
+  QString error;
+  if (!fi.exists())
+    error = "No such file or directory";
+  else if (!fi.isDir())
+    error = "Not a directory";
+  else if (!fi.isReadable())
+    error = "Permission denied";
+
+  // cd never reaches the shell, so record it here like any other command.
+  if (!error.isEmpty()) {
+    error = "cd: " + arg + ": " + error;
+    appendLine("[ERROR] " + error);
+    recordHistory(raw, "FAILED", {}, error, 1);
+  } else {
+    // Record first: the cache key uses the directory the cd was asked in.
+    recordHistory(raw, "EXECUTED", {}, {}, 0);
+    setCurrentDir(resolved);
   }
-
-  currentDir = resolved;
-  newPrompt();
+  commandFinished();
 }
 
 void TerminalUI::execute(const QString &cmd) {
-  SafetyResult check = isSafeCommand(cmd);
+  // A cd run in a child shell dies with that shell and never moves the
+  // terminal, so plain cd commands from the model or '!' are handled here.
+  // handleCd() takes its argument literally: options, globs and ~user are
+  // left out (only a bare ~ or a leading ~/ is expanded).
+  static const QRegularExpression CD_RE(
+      R"(^cd(?:\s+(?!-)(?:~(?:/|(?=\s|$)))?[^\s;&|<>()`$'"\\*?\[{~]*)?\s*$)");
+  if (CD_RE.match(cmd).hasMatch()) {
+    handleCd(cmd);
+    return;
+  }
+
+  SafetyResult check = checkSafety(cmd);
   if (!check.isSafe) {
+    EditBlock block(this);
     appendLine("[BLOCKED] " + check.reason + "\nCommand: " + cmd);
-    // Record blocked command in database
-    if (currentSessionId != -1) {
-      int cmdId = dal->recordCommand(currentSessionId, pendingInput.isEmpty() ? cmd : pendingInput, cmd, false, check.reason);
-      if (cmdId != -1) {
-        dal->updateCommandStatus(cmdId, "BLOCKED");
-      }
-    }
-    newPrompt();
+    recordBlocked(cmd, check.reason);
+    commandFinished();
     return;
   }
 
-  QProcess proc;
-  proc.setWorkingDirectory(currentDir);
-  proc.start("bash", {"-c", cmd});
-  if (!proc.waitForFinished(15000)) {
-    proc.kill();
-    appendLine("[ERROR] Command timed out after 15 seconds.");
-    // Record timed-out command in database
-    if (currentSessionId != -1) {
-      int cmdId = dal->recordCommand(currentSessionId, pendingInput.isEmpty() ? cmd : pendingInput, cmd, true);
-      if (cmdId != -1) {
-        dal->updateCommandStatus(cmdId, "FAILED");
-        dal->updateCommandExecution(cmdId, "", "Command timed out", -1, 15000);
+  // Run asynchronously so the event loop keeps servicing the UI (and any
+  // in-flight LLM reply) while the command runs.
+  process->setWorkingDirectory(currentDir);
+  runningCommand = cmd;
+  processRunning = true;
+  processTimedOut = false;
+  processCancelled = false;
+  inputLocked = true;
+  recordedOutput.clear();
+  recordedError.clear();
+  stdoutDecoder.resetState();
+  stderrDecoder.resetState();
+  outputStarted = false;
+  pendingNewlines = 0;
+  executionTimer.start();
+  commandTimeout->start();
+
+  // Plain "program args..." commands don't need a shell to parse them, so
+  // exec the program directly and skip the extra bash process. Anything
+  // with shell syntax (or a bash builtin that isn't on PATH) still goes
+  // through bash -c.
+  static const QRegularExpression NEEDS_SHELL_RE(
+      R"([|&;<>()`$*?\[\]{}~'"\\=#!\n])");
+  if (!NEEDS_SHELL_RE.match(cmd).hasMatch()) {
+    QStringList args = QProcess::splitCommand(cmd);
+    if (!args.isEmpty() && !args.first().contains('/')) {
+      QString program = QStandardPaths::findExecutable(args.takeFirst());
+      if (!program.isEmpty()) {
+        process->start(program, args);
+        return;
       }
     }
-    newPrompt();
+  }
+
+  process->start("bash", {"-c", cmd});
+}
+
+SafetyResult TerminalUI::checkSafety(const QString &cmd) {
+  // isSafeCommand() is a pure function of the string, so repeated commands
+  // (history recall, retries, cached AI answers) can reuse the verdict.
+  if (const SafetyResult *cached = safetyCache.object(cmd))
+    return *cached;
+  SafetyResult result = isSafeCommand(cmd);
+  safetyCache.insert(cmd, new SafetyResult(result));
+  return result;
+}
+
+void TerminalUI::onProcessOutput(const QByteArray &data, QByteArray &record,
+                                 QStringDecoder &decoder) {
+  // Keep a bounded copy for the command history; the screen gets everything.
+  if (record.size() < MAX_RECORDED_OUTPUT)
+    record.append(data.left(MAX_RECORDED_OUTPUT - record.size()));
+  // Coalesce bursts of small reads into one insertion every
+  // OUTPUT_FLUSH_MS instead of relaying out the document for each read.
+  pendingOutput += decoder.decode(data);
+  if (!outputFlushTimer->isActive())
+    outputFlushTimer->start();
+}
+
+void TerminalUI::flushOutput() {
+  outputFlushTimer->stop();
+  if (pendingOutput.isEmpty())
     return;
+  appendOutput(pendingOutput);
+  pendingOutput.clear();
+}
+
+void TerminalUI::appendOutput(QString chunk) {
+  if (!outputStarted) {
+    // Drop leading line breaks, the output starts on its own line.
+    qsizetype start = 0;
+    while (start < chunk.size() && chunk[start] == u'\n')
+      start++;
+    chunk.remove(0, start);
+    if (chunk.isEmpty())
+      return;
+    outputStarted = true;
+    pendingNewlines = 1;
   }
 
-  QString out = QString::fromLocal8Bit(proc.readAllStandardOutput()).trimmed();
-  QString err = QString::fromLocal8Bit(proc.readAllStandardError()).trimmed();
+  // Hold back trailing line breaks so the next prompt follows the last line
+  // of output directly.
+  qsizetype end = chunk.size();
+  while (end > 0 && chunk[end - 1] == u'\n')
+    end--;
+  if (end == 0) {
+    pendingNewlines += chunk.size();
+    return;
+  }
 
-  // Record successful command in database
-  if (currentSessionId != -1) {
-    int cmdId = dal->recordCommand(currentSessionId, pendingInput.isEmpty() ? cmd : pendingInput, cmd, true);
-    if (cmdId != -1) {
-      QString status = (proc.exitCode() == 0) ? "EXECUTED" : "FAILED";
-      dal->updateCommandStatus(cmdId, status);
-      dal->updateCommandExecution(cmdId, out, err, proc.exitCode(), 0);
-    }
+  QString text = QString(pendingNewlines, QLatin1Char('\n')) + chunk.left(end);
+  pendingNewlines = chunk.size() - end;
+
+  // Follow the output only while the view is at the bottom. If the user has
+  // scrolled up to read, append behind their back and leave the view alone.
+  QScrollBar *bar = verticalScrollBar();
+  if (bar->value() == bar->maximum()) {
+    moveCursor(QTextCursor::End);
+    insertPlainText(text);
+  } else {
+    QTextCursor cur(document());
+    cur.movePosition(QTextCursor::End);
+    cur.insertText(text);
   }
+}
+
+void TerminalUI::onProcessFinished() {
+  if (!processRunning)
+    return;
+  EditBlock block(this);
+  processRunning = false;
+  inputLocked = false;
+  commandTimeout->stop();
+  const QString cmd = runningCommand;
+
+  // Flush whatever arrived after the last readyRead notification.
+  onProcessOutput(process->readAllStandardOutput(), recordedOutput,
+                  stdoutDecoder);
+  onProcessOutput(process->readAllStandardError(), recordedError,
+                  stderrDecoder);
+  flushOutput();
+  QString out = QString::fromLocal8Bit(recordedOutput).trimmed();
+  QString err = QString::fromLocal8Bit(recordedError).trimmed();
+
+  double elapsedMs = executionTimer.elapsed();
+
+  if (process->error() == QProcess::FailedToStart || processTimedOut ||
+      processCancelled) {
+    QString reason;
+    if (processTimedOut)
+      reason = QString("Command timed out after %1 seconds.")
+                   .arg(COMMAND_TIMEOUT_MS / 1000);
+    else if (processCancelled)
+      reason = "Cancelled";
+    else
+      reason = "Failed to start shell: " + process->errorString();
+
+    appendLine(processCancelled ? "[Cancelled]" : "[ERROR] " + reason);
+    recordHistory(cmd, "FAILED", out, reason, -1, elapsedMs);
+    commandFinished();
+    return;
+  }
+
+  int exitCode =
+      (process->exitStatus() == QProcess::NormalExit) ? process->exitCode()
+                                                      : -1;
+
+  recordHistory(cmd, exitCode == 0 ? "EXECUTED" : "FAILED", out, err, exitCode,
+                elapsedMs);
+  commandFinished();
+}
+
+void TerminalUI::recordHistory(const QString &cmd, const QString &status,
+                               const QString &output, const QString &error,
+                               int exitCode, double elapsedMs) {
+  // Every command that ran (executed or failed) is recorded through here;
+  // blocked ones go through recordBlocked().
+
+  // Only model answers that passed the safety check and exited 0 are
+  // cached; a blocked or failing translation is asked for again next time.
+  if (status == "EXECUTED" && !pendingInput.isEmpty())
+    dal->cacheCommand(llmCacheKey(pendingInput), pendingInput, cmd);
+
+  if (currentSessionId == -1)
+    return;
+
+  QString userInput = pendingInput.isEmpty() ? cmd : pendingInput;
+
+  // One transaction per command: a single journal sync instead of one for
+  // each statement.
+  if (!beginHistoryWrite())
+    return;
+  int cmdId = dal->recordCommand(currentSessionId, userInput, cmd, true, "");
+  endHistoryWrite(cmdId != -1 && dal->updateCommandStatus(cmdId, status) &&
+                  dal->updateCommandExecution(cmdId, output, error, exitCode,
+                                              elapsedMs));
+}
+
+void TerminalUI::recordBlocked(const QString &cmd, const QString &reason) {
+  if (currentSessionId == -1)
+    return;
+
+  QString userInput = pendingInput.isEmpty() ? cmd : pendingInput;
+
+  if (!beginHistoryWrite())
+    return;
+  int cmdId =
+      dal->recordCommand(currentSessionId, userInput, cmd, false, reason);
+  endHistoryWrite(cmdId != -1 && dal->updateCommandStatus(cmdId, "BLOCKED"));
+}
+
+bool TerminalUI::beginHistoryWrite() {
+  if (dal->beginTransaction())
+    return true;
+  qWarning() << "Command not recorded:" << dal->getLastError();
+  return false;
+}
+
+// Commits the history transaction, or rolls it back if a write failed, so
+// the connection is never left inside an open transaction.
+void TerminalUI::endHistoryWrite(bool ok) {
+  if (!ok)
+    dal->rollbackTransaction();
+  else if (dal->commitTransaction()) // rolls back itself on failure
+    return;
+  qWarning() << "Command not recorded:" << dal->getLastError();
+}
+
+void TerminalUI::commandFinished() {
+  if (!runNextQueued())
+    newPrompt();
+}
 
-  if (!out.isEmpty())
-    appendLine(out);
-  if (!err.isEmpty())
-    appendLine(err);
+bool TerminalUI::runNextQueued() {
+  if (commandQueue.isEmpty())
+    return false;
+  QueuedCommand next = commandQueue.takeFirst();
+  pendingInput = next.input;
+  appendLine("[AI]    Generated: " + next.command);
+  execute(next.command);
+  return true;
+}
+
+void TerminalUI::addToHistory(const QString &entry) {
+  // Skip consecutive duplicates and keep only the most recent entries, so
+  // the history (and the history listing) stays bounded in long sessions.
+  if (!history.empty() && history.back() == entry)
+    return;
+  history.push_back(entry);
+  if (history.size() > MAX_HISTORY)
+    history.pop_front();
+}
+
+const QHash<QString, TerminalUI::BuiltinHandler> &TerminalUI::builtins() {
+  static const QHash<QString, BuiltinHandler> BUILTINS = {
+      {"clear", &TerminalUI::clearScreen},
+      {"exit", &TerminalUI::exitTerminal},
+      {"quit", &TerminalUI::exitTerminal},
+      {"help", &TerminalUI::showHelp},
+      {"pwd", &TerminalUI::printWorkingDir},
+      {"history", &TerminalUI::showHistory},
+  };
+  return BUILTINS;
+}
+
+void TerminalUI::clearScreen() {
+  clear();
+  newPrompt();
+}
+
+void TerminalUI::exitTerminal() { QApplication::quit(); }
+
+void TerminalUI::showHelp() {
+  EditBlock block(this);
+  appendLine(helpText());
+  newPrompt();
+}
+
+void TerminalUI::printWorkingDir() {
+  EditBlock block(this);
+  appendLine(currentDir);
+  newPrompt();
+}
+
+void TerminalUI::showHistory() {
+  EditBlock block(this);
+  // Build the whole listing first and insert it in one go; one insertion
+  // costs a single layout pass instead of one per entry.
+  QString listing;
+  int width = QString::number(history.size()).length();
+  for (size_t i = 0; i < history.size(); i++) {
+    if (i > 0)
+      listing += '\n';
+    listing += QString("  %1  %2").arg(i + 1, width).arg(history[i]);
+  }
+  appendLine(listing);
   newPrompt();
 }
 
@@ -430,14 +807,31 @@ QString TerminalUI::shortCwd() const {
   return currentDir;
 }
 
+QString TerminalUI::llmCacheKey(const QString &input) const {
+  // Paths and filenames are case-sensitive, and the prompt includes the cwd.
+  return dal->hashCommand(llm->modelName() + '|' +
+                          QString::number(LocalLLMService::PROMPT_VERSION) +
+                          '|' + currentDir + '|' + input.simplified());
+}
+
 void TerminalUI::onCommandReady(const QString &cmd) {
   inputLocked = false;
   appendLine("[AI]    Generated: " + cmd);
   execute(cmd);
 }
 
+void TerminalUI::onCommandsReady(const QStringList &cmds) {
+  inputLocked = false;
+  for (int i = 0; i < cmds.size() && i < pendingBatch.size(); i++)
+    commandQueue.append({pendingBatch[i], cmds[i]});
+  pendingBatch.clear();
+  commandFinished();
+}
+
 void TerminalUI::onOllamaError(const QString &msg) {
+  EditBlock block(this);
   inputLocked = false;
+  pendingBatch.clear();
   appendLine("[ERROR] " + msg);
   newPrompt();
 }
@@ -452,6 +846,45 @@ void TerminalUI::onAvailabilityChecked(bool ok, const QString &modelName) {
   newPrompt();
 }
 
+bool TerminalUI::isBuiltinCommand(const QString &input) {
+  return builtins().contains(input) || input == "cd" ||
+         input.startsWith("cd ") || input.startsWith("!");
+}
+
+void TerminalUI::insertFromMimeData(const QMimeData *source) {
+  QStringList lines;
+  for (const QString &line : source->text().split('\n')) {
+    QString l = line.trimmed();
+    if (!l.isEmpty())
+      lines << l;
+  }
+
+  bool atEmptyPrompt = promptLength > 0 && currentInput().trimmed().isEmpty();
+
+  // Several natural-language instructions pasted at once are translated
+  // with one model request instead of one request per line.
+  bool batch = !inputLocked && atEmptyPrompt && lines.size() > 1;
+  for (const QString &line : lines)
+    if (isBuiltinCommand(line) || isShellCommand(line))
+      batch = false;
+
+  if (!batch) {
+    QPlainTextEdit::insertFromMimeData(source);
+    return;
+  }
+
+  moveCursor(QTextCursor::End);
+  insertPlainText(lines.join('\n'));
+  for (const QString &line : lines)
+    addToHistory(line);
+  historyIndex = history.size();
+
+  pendingBatch = lines;
+  inputLocked = true;
+  appendLine("[AI]    Thinking...");
+  llm->generateCommands(lines, currentDir);
+}
+
 bool TerminalUI::isShellCommand(const QString &input) {
   if (input.startsWith('/') || input.startsWith("./") || input.startsWith("~/"))
     return true;
@@ -461,14 +894,16 @@ bool TerminalUI::isShellCommand(const QString &input) {
   return SHELL_COMMANDS.contains(first);
 }
 
-QString TerminalUI::helpText() {
-  return QString(
+const QString &TerminalUI::helpText() {
+  // Decoded once; every later call hands back the same shared string.
+  static const QString HELP = QStringLiteral(
     "\n╔══════════════════════════════════════════════════════════════╗\n"
     "║            SE TERMINAL — HELP & COMMANDS                   ║\n"
     "╠══════════════════════════════════════════════════════════════╣\n"
     "║  BUILT-IN COMMANDS:                                        ║\n"
     "║    help      — Show this help message                      ║\n"
     "║    clear     — Clear the terminal screen                   ║\n"
+    "║    history   — Show previously entered commands            ║\n"
     "║    exit/quit — Close the terminal                          ║\n"
     "║    pwd       — Print current working directory              ║\n"
     "║    cd <dir>  — Change directory                            ║\n"
@@ -489,12 +924,13 @@ QString TerminalUI::helpText() {
     "║  SHORTCUTS:                                                ║\n"
     "║    Ctrl+T    — New tab                                     ║\n"
     "║    Ctrl+W    — Close tab                                   ║\n"
-    "║    Ctrl+C    — Cancel AI generation                        ║\n"
+    "║    Ctrl+C    — Cancel AI generation / running command      ║\n"
     "║    Tab       — Autocomplete commands/files                 ║\n"
     "║    Up/Down   — Browse command history                      ║\n"
     "║    Right-click — Context menu (copy, paste, theme)         ║\n"
     "╚══════════════════════════════════════════════════════════════╝"
   );
+  return HELP;
 }
 
 const QSet<QString> TerminalUI::SHELL_COMMANDS = {
@@ -533,12 +969,10 @@ const QSet<QString> TerminalUI::SHELL_COMMANDS = {
 
 void TerminalUI::handleAutocomplete() {
   moveCursor(QTextCursor::End);
-  QString lineText = textCursor().block().text();
-  int dol = lineText.indexOf("$ ");
-  if (dol == -1)
+  if (inputStart() == 0)
     return;
 
-  QString buffer = lineText.mid(dol + 2);
+  QString buffer = currentInput();
   if (buffer.isEmpty())
     return;
 
@@ -561,11 +995,10 @@ void TerminalUI::handleAutocomplete() {
     }
 
     QString pathEnv = qEnvironmentVariable("PATH");
-    QStringList paths = pathEnv.split(":");
+    QStringList paths = pathEnv.split(':', Qt::SkipEmptyParts);
     for (const QString &dir : paths) {
+      // entryList() on a missing directory is just empty; no exists() stat.
       QDir d(dir);
-      if (!d.exists())
-        continue;
       QStringList filters;
       filters << currentWord + "*";
       QStringList files = d.entryList(filters, QDir::Files | QDir::Executable);
@@ -593,14 +1026,12 @@ void TerminalUI::handleAutocomplete() {
     }
 
     QDir d(searchPath);
-    if (d.exists()) {
-      QStringList filters;
-      filters << prefix + "*";
-      QStringList files =
-          d.entryList(filters, QDir::Files | QDir::Dirs | QDir::NoDotAndDotDot);
-      for (const QString &file : files) {
-        matchSet.insert(file);
-      }
+    QStringList filters;
+    filters << prefix + "*";
+    QStringList files =
+        d.entryList(filters, QDir::Files | QDir::Dirs | QDir::NoDotAndDotDot);
+    for (const QString &file : files) {
+      matchSet.insert(file);
     }
   }
 
@@ -693,8 +1124,7 @@ void TerminalUI::contextMenuEvent(QContextMenuEvent *event) {
 
   QAction *clearAction = menu->addAction("Clear");
   connect(clearAction, &QAction::triggered, this, [this]() {
-    this->clear();
-    this->newPrompt();
+    this->clearScreen();
   });
 
   menu->exec(event->globalPos());
@@ -1,33 +1,83 @@
 #ifndef TERMINAL_UI_H
 #define TERMINAL_UI_H
 
+#include "SafetyFilter.h"
 #include "TerminalHighlighter.h"
+#include <QCache>
+#include <QElapsedTimer>
+#include <QHash>
 #include <QPlainTextEdit>
 #include <QSet>
-#include <vector>
+#include <QStringDecoder>
+#include <QStringList>
+#include <deque>
 
 class LocalLLMService;
 class DataAccessLayer;
+class QProcess;
+class QTimer;
 
 class TerminalUI : public QPlainTextEdit {
   Q_OBJECT
 
 public:
   explicit TerminalUI(QWidget *parent = nullptr);
+  ~TerminalUI() override;
 
 private:
   LocalLLMService *llm;
   DataAccessLayer *dal;
   QString currentDir;
+  QString userHost;
+  QString promptText;
+  int promptLength = 0; // prompt width on the input line
   QString pendingInput;
   bool inputLocked = false;
   int currentSessionId = -1;
 
   static const QSet<QString> SHELL_COMMANDS;
+  static constexpr int COMMAND_TIMEOUT_MS = 15000;
+  static constexpr qsizetype MAX_RECORDED_OUTPUT = 64 * 1024;
+  static constexpr int SAFETY_CACHE_SIZE = 512;
+  static constexpr int OUTPUT_FLUSH_MS = 30;
+  static constexpr int MAX_SCROLLBACK = 5000;
+
+  //  Safety verdicts for recently seen commands (LRU)
+  QCache<QString, SafetyResult> safetyCache{SAFETY_CACHE_SIZE};
+  SafetyResult checkSafety(const QString &cmd);
+
+  //  Command execution
+  QProcess *process;
+  QTimer *commandTimeout;
+  QString runningCommand;
+  bool processRunning = false;
+  QElapsedTimer executionTimer;
+  bool processTimedOut = false;
+  bool processCancelled = false;
+
+  //  Queued AI commands (multi-line paste)
+  struct QueuedCommand {
+    QString input;
+    QString command;
+  };
+  QList<QueuedCommand> commandQueue;
+  QStringList pendingBatch;
+  QByteArray recordedOutput;
+  QByteArray recordedError;
+  // Incremental decoders, so a multi-byte character split across two reads
+  // is decoded intact instead of as two replacement characters.
+  QStringDecoder stdoutDecoder{QStringDecoder::System};
+  QStringDecoder stderrDecoder{QStringDecoder::System};
+  bool outputStarted = false;
+  qsizetype pendingNewlines = 0;
+  QString pendingOutput;
+  QTimer *outputFlushTimer;
 
   //  History
-  std::vector<QString> history;
+  static constexpr size_t MAX_HISTORY = 1000;
+  std::deque<QString> history;
   int historyIndex = 0;
+  void addToHistory(const QString &entry);
   QString currentBuffer;
 
   //  Theming & Syntax Highlighting
@@ -38,6 +88,9 @@ private:
   //  UI helpers
   void printBanner();
   void newPrompt();
+  void setCurrentDir(const QString &dir);
+  int inputStart() const;
+  QString currentInput() const;
   void appendLine(const QString &text);
   void replaceCurrentLine(const QString &text);
 
@@ -48,18 +101,44 @@ private:
   //  Core logic
   void onCommandSubmitted(const QString &raw);
   void handleCd(const QString &raw);
+
+  //  Built-in commands, dispatched by name from onCommandSubmitted()
+  using BuiltinHandler = void (TerminalUI::*)();
+  static const QHash<QString, BuiltinHandler> &builtins();
+  void clearScreen();
+  void exitTerminal();
+  void showHelp();
+  void printWorkingDir();
+  void showHistory();
   void execute(const QString &cmd);
+  void onProcessOutput(const QByteArray &data, QByteArray &record,
+                       QStringDecoder &decoder);
+  void appendOutput(QString chunk);
+  void flushOutput();
+  void onProcessFinished();
+  void commandFinished();
+  void recordHistory(const QString &cmd, const QString &status,
+                     const QString &output, const QString &error,
+                     int exitCode = -1, double elapsedMs = 0);
+  void recordBlocked(const QString &cmd, const QString &reason);
+  bool beginHistoryWrite();
+  void endHistoryWrite(bool ok);
+  bool runNextQueued();
   QString shortCwd() const;
+  QString llmCacheKey(const QString &input) const;
 
   static bool isShellCommand(const QString &input);
-  static QString helpText();
+  static bool isBuiltinCommand(const QString &input);
+  static const QString &helpText();
 
 protected:
   void keyPressEvent(QKeyEvent *event) override;
   void contextMenuEvent(QContextMenuEvent *event) override;
+  void insertFromMimeData(const QMimeData *source) override;
 
 private slots:
   void onCommandReady(const QString &cmd);
+  void onCommandsReady(const QStringList &cmds);
   void onOllamaError(const QString &msg);
   void onAvailabilityChecked(bool ok, const QString &modelName);
   void toggleTheme();
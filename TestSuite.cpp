@@ -1,6 +1,7 @@
 #include "TestSuite.h"
 #include "DataAccessLayer.h"
 #include "SafetyFilter.h"
+#include <QCoreApplication>
 #include <QDateTime>
 #include <QDebug>
 #include <QDir>
@@ -9,6 +10,28 @@
 #include <chrono>
 #include <ctime>
 
+// Tests that don't exercise on-disk persistence run against an in-memory
+// SQLite database: no file to create, sync and delete per test.
+static const QString IN_MEMORY_DB = QStringLiteral(":memory:");
+static DataAccessLayer *sharedDal = nullptr;
+
+// One in-memory DAL shared by those tests, so the connection is opened and
+// the schema built once. Every fetch wipes the tables, so each test still
+// starts from an empty database.
+static DataAccessLayer &sharedTestDal() {
+  if (!sharedDal) {
+    sharedDal = new DataAccessLayer(IN_MEMORY_DB);
+    sharedDal->initializeDatabase();
+    // Close the connection while QCoreApplication is still around.
+    qAddPostRoutine([] {
+      delete sharedDal;
+      sharedDal = nullptr;
+    });
+  }
+  sharedDal->clearAllData();
+  return *sharedDal;
+}
+
 // ===========================================================================
 //  TestSuite Framework Implementation
 // ===========================================================================
@@ -19,10 +42,13 @@ void TestSuite::addTest(const QString &name, const QString &category,
 }
 
 void TestSuite::runAll() {
-  std::cout << "\n" << std::string(70, '=') << std::endl;
-  std::cout << "  CONSOLIDATED TERMINAL APPLICATION - TEST SUITE" << std::endl;
-  std::cout << std::string(70, '=') << "\n" << std::endl;
+  std::cout << "\n" << std::string(70, '=') << '\n';
+  std::cout << "  CONSOLIDATED TERMINAL APPLICATION - TEST SUITE\n";
+  std::cout << std::string(70, '=') << "\n\n";
 
+  // Rows end in '\n' rather than std::endl: the stream is flushed once after
+  // the summary instead of once per test. Output from the tests themselves
+  // still lands between the rows in order.
   int testNumber = 1;
   for (const Test &test : tests) {
     qint64 startTime = getCurrentTimeMs();
@@ -74,7 +100,7 @@ void TestSuite::runAll() {
     std::cout << std::left << std::setw(3) << testNumber << ". "
               << std::setw(58) << test.name.toStdString()
               << " [" << std::setw(5) << executionTime << " ms] "
-              << (result ? "✓ PASS" : "✗ FAIL") << std::endl;
+              << (result ? "✓ PASS" : "✗ FAIL") << '\n';
     testNumber++;
   }
 
@@ -125,9 +151,9 @@ void TestSuite::generateReport(const QString &filePath) {
 }
 
 void TestSuite::printSummary() {
-  std::cout << "\n" << std::string(70, '=') << std::endl;
-  std::cout << "  TEST SUMMARY" << std::endl;
-  std::cout << std::string(70, '=') << std::endl;
+  std::cout << "\n" << std::string(70, '=') << '\n';
+  std::cout << "  TEST SUMMARY\n";
+  std::cout << std::string(70, '=') << '\n';
   std::cout << "Total Tests: " << stats.totalTests
             << " (White Box: " << stats.whiteBoxTests
             << ", Black Box: " << stats.blackBoxTests << ")\n";
@@ -137,7 +163,7 @@ void TestSuite::printSummary() {
             << stats.getPassRate() << "%\n";
   std::cout << "Total Time:  " << std::fixed << std::setprecision(1)
             << stats.totalTimeMs << " ms\n";
-  std::cout << std::string(70, '=') << "\n" << std::endl;
+  std::cout << std::string(70, '=') << "\n\n" << std::flush;
 }
 
 qint64 TestSuite::getCurrentTimeMs() const {
@@ -159,8 +185,8 @@ namespace WhiteBoxTests {
 // WB-1: Data Access Layer Core Functionality
 // Tests internal DAL workflow: init DB → create session → record command → retrieve history
 bool test_DAL_CoreFunctionality() {
-  DataAccessLayer dal("test_whitebox_dal.db");
-  if (!dal.initializeDatabase() || !dal.isConnected())
+  DataAccessLayer &dal = sharedTestDal();
+  if (!dal.isConnected())
     return false;
 
   int sessionId = dal.createSession("WhiteBox Session", "/home/test");
@@ -172,10 +198,7 @@ bool test_DAL_CoreFunctionality() {
     return false;
 
   QList<CommandRecord> history = dal.getCommandHistory(sessionId);
-  bool result = history.size() == 1 && history[0].commandId == cmdId;
-
-  QFile::remove("test_whitebox_dal.db");
-  return result;
+  return history.size() == 1 && history[0].commandId == cmdId;
 }
 
 // WB-2: Safety Filter Security Rules
@@ -196,18 +219,14 @@ bool test_SafetyFilter_SecurityRules() {
 // Tests internal branching: records a safe and unsafe command, then verifies
 // getBlockedCommands() returns only the unsafe one.
 bool test_CommandProcessing_InternalLogic() {
-  DataAccessLayer dal("test_processing.db");
-  dal.initializeDatabase();
+  DataAccessLayer &dal = sharedTestDal();
   int sid = dal.createSession("Test", "/");
 
   int id1 = dal.recordCommand(sid, "list files", "ls", true);
   int id2 = dal.recordCommand(sid, "delete all", "rm -rf /", false);
 
   QList<CommandRecord> blocked = dal.getBlockedCommands(sid);
-  bool result = blocked.size() == 1 && blocked[0].commandId == id2;
-
-  QFile::remove("test_processing.db");
-  return result;
+  return blocked.size() == 1 && blocked[0].commandId == id2;
 }
 
 } // namespace WhiteBoxTests
@@ -226,8 +245,7 @@ namespace BlackBoxTests {
 // Simulates the user flow: provide a natural language prompt, expect it to be
 // stored in command history with the correct user input.
 bool test_UserReq_EndToEndFlow() {
-  DataAccessLayer dal("test_blackbox_flow.db");
-  dal.initializeDatabase();
+  DataAccessLayer &dal = sharedTestDal();
   int sessionId = dal.createSession("E2E Session", "/home/user");
 
   QString userPrompt = "show all files";
@@ -235,10 +253,7 @@ bool test_UserReq_EndToEndFlow() {
   dal.recordCommand(sessionId, userPrompt, generatedCmd, true);
 
   QList<CommandRecord> history = dal.getCommandHistory(sessionId);
-  bool result = history.size() > 0 && history[0].userInput == userPrompt;
-
-  QFile::remove("test_blackbox_flow.db");
-  return result;
+  return history.size() > 0 && history[0].userInput == userPrompt;
 }
 
 // BB-2: User Safety Protection and Blocking
@@ -329,17 +344,12 @@ bool test_DatabaseInitialization() {
 // TC-02: Session Creation with Valid Data
 // --------------------------------------------------------------------------
 bool test_SessionCreation() {
-  QString dbName = "test_tc02_session.db";
-  cleanupTestDb(dbName);
-
-  DataAccessLayer dal(dbName);
-  dal.initializeDatabase();
+  DataAccessLayer &dal = sharedTestDal();
 
   // Test: Creating session returns valid (positive) ID
   int sessionId = dal.createSession("Test Session Alpha", "/home/testuser");
   if (sessionId <= 0) {
     std::cout << "    DETAIL: createSession returned invalid ID: " << sessionId << std::endl;
-    cleanupTestDb(dbName);
     return false;
   }
 
@@ -347,7 +357,6 @@ bool test_SessionCreation() {
   int sessionId2 = dal.createSession("Test Session Beta", "/tmp");
   if (sessionId2 <= sessionId) {
     std::cout << "    DETAIL: Second session ID not greater than first" << std::endl;
-    cleanupTestDb(dbName);
     return false;
   }
 
@@ -355,11 +364,9 @@ bool test_SessionCreation() {
   QList<Session> sessions = dal.getAllSessions();
   if (sessions.size() != 2) {
     std::cout << "    DETAIL: Expected 2 sessions, got " << sessions.size() << std::endl;
-    cleanupTestDb(dbName);
     return false;
   }
 
-  cleanupTestDb(dbName);
   return true;
 }
 
@@ -367,11 +374,7 @@ bool test_SessionCreation() {
 // TC-03: Session Retrieval by ID
 // --------------------------------------------------------------------------
 bool test_SessionRetrieval() {
-  QString dbName = "test_tc03_retrieval.db";
-  cleanupTestDb(dbName);
-
-  DataAccessLayer dal(dbName);
-  dal.initializeDatabase();
+  DataAccessLayer &dal = sharedTestDal();
 
   int sessionId = dal.createSession("Retrieval Test", "/home/user");
   Session session = dal.getSession(sessionId);
@@ -379,21 +382,18 @@ bool test_SessionRetrieval() {
   // Test: Retrieved session has correct name
   if (session.sessionName != "Retrieval Test") {
     std::cout << "    DETAIL: Session name mismatch: " << session.sessionName.toStdString() << std::endl;
-    cleanupTestDb(dbName);
     return false;
   }
 
   // Test: Retrieved session has correct working directory
   if (session.workingDirectory != "/home/user") {
     std::cout << "    DETAIL: Working dir mismatch: " << session.workingDirectory.toStdString() << std::endl;
-    cleanupTestDb(dbName);
     return false;
   }
 
   // Test: Session status should be ACTIVE
   if (session.sessionStatus != "ACTIVE") {
     std::cout << "    DETAIL: Status mismatch: " << session.sessionStatus.toStdString() << std::endl;
-    cleanupTestDb(dbName);
     return false;
   }
 
@@ -401,11 +401,9 @@ bool test_SessionRetrieval() {
   Session notFound = dal.getSession(99999);
   if (notFound.sessionId != -1) {
     std::cout << "    DETAIL: Non-existent session returned valid ID" << std::endl;
-    cleanupTestDb(dbName);
     return false;
   }
 
-  cleanupTestDb(dbName);
   return true;
 }
 
@@ -413,11 +411,7 @@ bool test_SessionRetrieval() {
 // TC-04: Command Recording and History Retrieval
 // --------------------------------------------------------------------------
 bool test_CommandRecording() {
-  QString dbName = "test_tc04_commands.db";
-  cleanupTestDb(dbName);
-
-  DataAccessLayer dal(dbName);
-  dal.initializeDatabase();
+  DataAccessLayer &dal = sharedTestDal();
   int sid = dal.createSession("Command Test", "/home/user");
 
   // Record multiple commands
@@ -428,7 +422,6 @@ bool test_CommandRecording() {
   // Test: All command IDs should be valid
   if (cmd1 <= 0 || cmd2 <= 0 || cmd3 <= 0) {
     std::cout << "    DETAIL: Invalid command IDs: " << cmd1 << ", " << cmd2 << ", " << cmd3 << std::endl;
-    cleanupTestDb(dbName);
     return false;
   }
 
@@ -436,7 +429,6 @@ bool test_CommandRecording() {
   QList<CommandRecord> history = dal.getCommandHistory(sid);
   if (history.size() != 3) {
     std::cout << "    DETAIL: Expected 3 commands, got " << history.size() << std::endl;
-    cleanupTestDb(dbName);
     return false;
   }
 
@@ -444,7 +436,6 @@ bool test_CommandRecording() {
   CommandRecord rec = dal.getCommandRecord(cmd1);
   if (rec.userInput != "list files") {
     std::cout << "    DETAIL: userInput mismatch: " << rec.userInput.toStdString() << std::endl;
-    cleanupTestDb(dbName);
     return false;
   }
 
@@ -452,42 +443,62 @@ bool test_CommandRecording() {
   int total = dal.getTotalCommandsExecuted(sid);
   if (total != 3) {
     std::cout << "    DETAIL: Total commands expected 3, got " << total << std::endl;
-    cleanupTestDb(dbName);
     return false;
   }
 
-  cleanupTestDb(dbName);
   return true;
 }
 
+// Fixed case tables for TC-05/TC-06, built once instead of on every run.
+struct DangerousCase {
+  const char *command;
+  const char *expectedReason;
+};
+
+static const DangerousCase DANGEROUS_CASES[] = {
+  {":(){:|:&};:", "Fork bomb"},
+  {"rm -rf /", "root filesystem"},
+  {"rm -rf ~", "home directory"},
+  {"sudo su", "root shell"},
+  {"mkfs.ext4 /dev/sda", "Filesystem formatting"},
+  {"dd if=/dev/zero of=/dev/sda", "Raw disk write"},
+  {"shutdown -h now", "shutdown"},
+  {"kill -9 -1", "Kill all"},
+  {"sudo rm -rf build", "privileged"},
+  {"  sudo rm -rf build", "privileged"},
+  // Whitelisted first word chained to something else: must not take the
+  // fast path.
+  {"ls; rm -rf /", "root filesystem"},
+  {"cat x && shutdown now", "shutdown"},
+  {"echo hi\nreboot", "reboot"},
+};
+
+static const char *const SAFE_CASES[] = {
+  "ls -la",
+  "pwd",
+  "echo Hello World",
+  "cat /etc/hostname",
+  "grep -r pattern .",
+  "find . -name '*.cpp'",
+  "mkdir test_dir",
+  "touch new_file.txt",
+  "ps aux",
+  "date",
+  "sudoku rm -rf build",
+};
+
 // --------------------------------------------------------------------------
 // TC-05: Safety Filter Blocks Dangerous Commands
 // --------------------------------------------------------------------------
 bool test_SafetyFilterBlocking() {
-  struct TestCase {
-    QString command;
-    QString expectedReason;
-  };
-
-  QList<TestCase> dangerousCmds = {
-    {":(){:|:&};:", "Fork bomb"},
-    {"rm -rf /", "root filesystem"},
-    {"rm -rf ~", "home directory"},
-    {"sudo su", "root shell"},
-    {"mkfs.ext4 /dev/sda", "Filesystem formatting"},
-    {"dd if=/dev/zero of=/dev/sda", "Raw disk write"},
-    {"shutdown -h now", "shutdown"},
-    {"kill -9 -1", "Kill all"},
-  };
-
-  for (const TestCase &tc : dangerousCmds) {
+  for (const DangerousCase &tc : DANGEROUS_CASES) {
     SafetyResult result = isSafeCommand(tc.command);
     if (result.isSafe) {
-      std::cout << "    DETAIL: Command NOT blocked: " << tc.command.toStdString() << std::endl;
+      std::cout << "    DETAIL: Command NOT blocked: " << tc.command << std::endl;
       return false;
     }
     if (!result.reason.contains(tc.expectedReason, Qt::CaseInsensitive)) {
-      std::cout << "    DETAIL: Reason mismatch for '" << tc.command.toStdString()
+      std::cout << "    DETAIL: Reason mismatch for '" << tc.command
                 << "': got '" << result.reason.toStdString() << "'" << std::endl;
       return false;
     }
@@ -500,23 +511,10 @@ bool test_SafetyFilterBlocking() {
 // TC-06: Safety Filter Allows Safe Commands
 // --------------------------------------------------------------------------
 bool test_SafetyFilterAllowing() {
-  QStringList safeCmds = {
-    "ls -la",
-    "pwd",
-    "echo Hello World",
-    "cat /etc/hostname",
-    "grep -r pattern .",
-    "find . -name '*.cpp'",
-    "mkdir test_dir",
-    "touch new_file.txt",
-    "ps aux",
-    "date",
-  };
-
-  for (const QString &cmd : safeCmds) {
+  for (const char *cmd : SAFE_CASES) {
     SafetyResult result = isSafeCommand(cmd);
     if (!result.isSafe) {
-      std::cout << "    DETAIL: Safe command BLOCKED: " << cmd.toStdString()
+      std::cout << "    DETAIL: Safe command BLOCKED: " << cmd
                 << " Reason: " << result.reason.toStdString() << std::endl;
       return false;
     }
@@ -529,17 +527,12 @@ bool test_SafetyFilterAllowing() {
 // TC-07: Command Cache Insertion and Lookup
 // --------------------------------------------------------------------------
 bool test_CommandCaching() {
-  QString dbName = "test_tc07_cache.db";
-  cleanupTestDb(dbName);
-
-  DataAccessLayer dal(dbName);
-  dal.initializeDatabase();
+  DataAccessLayer &dal = sharedTestDal();
 
   // Insert a cache entry
   bool cached = dal.cacheCommand("hash_abc123", "show files", "ls -la");
   if (!cached) {
     std::cout << "    DETAIL: cacheCommand returned false" << std::endl;
-    cleanupTestDb(dbName);
     return false;
   }
 
@@ -547,7 +540,6 @@ bool test_CommandCaching() {
   QString result = dal.getCachedCommand("hash_abc123");
   if (result != "ls -la") {
     std::cout << "    DETAIL: Cached command mismatch: " << result.toStdString() << std::endl;
-    cleanupTestDb(dbName);
     return false;
   }
 
@@ -555,7 +547,6 @@ bool test_CommandCaching() {
   QString notFound = dal.getCachedCommand("nonexistent_hash");
   if (!notFound.isEmpty()) {
     std::cout << "    DETAIL: Non-existent key returned data" << std::endl;
-    cleanupTestDb(dbName);
     return false;
   }
 
@@ -564,11 +555,9 @@ bool test_CommandCaching() {
   QString result2 = dal.getCachedCommand("hash_abc123");
   if (result2 != "ls -la") {
     std::cout << "    DETAIL: Duplicate insert overwrote existing data" << std::endl;
-    cleanupTestDb(dbName);
     return false;
   }
 
-  cleanupTestDb(dbName);
   return true;
 }
 
@@ -576,11 +565,7 @@ bool test_CommandCaching() {
 // TC-08: Blocked Command Count Accuracy
 // --------------------------------------------------------------------------
 bool test_BlockedCommandCount() {
-  QString dbName = "test_tc08_blocked.db";
-  cleanupTestDb(dbName);
-
-  DataAccessLayer dal(dbName);
-  dal.initializeDatabase();
+  DataAccessLayer &dal = sharedTestDal();
   int sid = dal.createSession("Blocked Count Test", "/home");
 
   // Record 3 safe commands and 2 unsafe commands
@@ -595,17 +580,14 @@ bool test_BlockedCommandCount() {
 
   if (safeCount != 3) {
     std::cout << "    DETAIL: Expected 3 safe, got " << safeCount << std::endl;
-    cleanupTestDb(dbName);
     return false;
   }
 
   if (blockedCount != 2) {
     std::cout << "    DETAIL: Expected 2 blocked, got " << blockedCount << std::endl;
-    cleanupTestDb(dbName);
     return false;
   }
 
-  cleanupTestDb(dbName);
   return true;
 }
 